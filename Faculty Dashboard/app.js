@@ -28,6 +28,8 @@ let accessToken = sessionStorage.getItem('faculty_access_token');
 let refreshToken = sessionStorage.getItem('faculty_refresh_token');
 let chartInstance = null;
 let allStatsData = []; // Store raw data for filtering
+let allHistoryData = []; // Attendance history received so far
+let syncCursor = null; // Cursor from the last /get_dashboard response
 
 // Init
 if (accessToken) {
@@ -62,7 +64,7 @@ function switchTab(tab) {
         tabHistory.classList.add('active');
         sectionOverview.classList.add('d-none');
         sectionHistory.classList.remove('d-none');
-        fetchHistory(); // Load data on switch
+        fetchDashboard(); // Sync data on switch
     }
 }
 
@@ -105,6 +107,7 @@ logoutBtn.addEventListener('click', () => {
     sessionStorage.removeItem('faculty_refresh_token');
     accessToken = null;
     refreshToken = null;
+    resetDashboardState();
     loginView.classList.remove('d-none');
     dashboardView.classList.add('d-none');
 });
@@ -119,10 +122,10 @@ function showError(msg) {
 function showDashboard() {
     loginView.classList.add('d-none');
     dashboardView.classList.remove('d-none');
-    fetchStats();
+    fetchDashboard();
 }
 
-refreshBtn.addEventListener('click', fetchStats);
+refreshBtn.addEventListener('click', fetchDashboard);
 
 async function refreshAccessToken() {
     try {
@@ -147,9 +150,21 @@ async function refreshAccessToken() {
     }
 }
 
-async function fetchStats() {
+function resetDashboardState() {
+    allStatsData = [];
+    allHistoryData = [];
+    syncCursor = null;
+}
+
+async function fetchDashboard() {
     try {
-        const res = await fetch(`${RESOURCE_URL}/get_all_student_stats?section=${encodeURIComponent(SECTION)}`, {
+        // Only ask for changes since the last sync; the browser negotiates gzip/br itself
+        let url = `${RESOURCE_URL}/get_dashboard?section=${encodeURIComponent(SECTION)}`;
+        if (syncCursor) {
+            url += `&since=${encodeURIComponent(syncCursor)}`;
+        }
+
+        const res = await fetch(url, {
             headers: { 'Authorization': `Bearer ${accessToken}` }
         });
 
@@ -158,8 +173,8 @@ async function fetchStats() {
             console.log(`Received ${res.status}, attempting refresh...`);
             const refreshed = await refreshAccessToken();
             if (refreshed) {
-                // Retry the request with new token
-                return fetchStats();
+                // Retry the request with new token (still a delta sync)
+                return fetchDashboard();
             } else {
                 // Refresh failed, logout
                 console.warn("Refresh failed, logging out.");
@@ -173,17 +188,46 @@ async function fetchStats() {
         }
 
         const data = await res.json();
-        allStatsData = data; // Save global reference
-        populateSubjectFilter(data);
-        renderData(data);
+        mergeDashboard(data);
+        syncCursor = data.cursor;
+
+        populateSubjectFilter(allStatsData);
+        renderData(allStatsData);
+        renderHistory(allHistoryData);
     } catch (err) {
-        console.error("Stats Fetch Error:", err);
+        console.error("Dashboard Fetch Error:", err);
         // Show more detailed error if available
         const msg = err.message || 'Failed to fetch data';
         alert(`Error: ${msg}. Check console for details.`);
     }
 }
 
+function mergeDashboard(data) {
+    if (data.full) {
+        allStatsData = data.stats;
+        allHistoryData = data.history;
+        return;
+    }
+
+    // Replace changed counters, keyed by student and subject
+    const statsByKey = new Map(allStatsData.map(item => [`${item.username}|${item.subject}`, item]));
+    data.stats.forEach(item => {
+        statsByKey.set(`${item.username}|${item.subject}`, item);
+    });
+
+    // New sessions change the total of every student in that subject
+    allStatsData = [...statsByKey.values()].map(item => {
+        const total = data.totals[item.subject];
+        if (total === undefined || total === item.total) return item;
+        const percentage = total > 0 ? Math.round(item.attended / total * 10000) / 100 : 0;
+        return { ...item, total, percentage };
+    });
+
+    // The server re-sends a safety window of history; drop rows we already have
+    const seenIds = new Set(allHistoryData.map(item => item.id));
+    allHistoryData = allHistoryData.concat(data.history.filter(item => !seenIds.has(item.id)));
+}
+
 function populateSubjectFilter(data) {
     // Get unique subjects
     const subjects = [...new Set(data.map(item => item.subject))].sort();
@@ -332,39 +376,7 @@ function updateChart(passed, failed) {
 
 // --- History Logic ---
 
-refreshHistoryBtn.addEventListener('click', fetchHistory);
-
-async function fetchHistory() {
-    try {
-        const res = await fetch(`${RESOURCE_URL}/get_attendance_records?section=${encodeURIComponent(SECTION)}`, {
-            headers: { 'Authorization': `Bearer ${accessToken}` }
-        });
-
-        if (res.status === 401 || res.status === 403) {
-            // Try to refresh token
-            const refreshed = await refreshAccessToken();
-            if (refreshed) {
-                // Retry the request with new token
-                return fetchHistory();
-            } else {
-                // Refresh failed, logout
-                logoutBtn.click();
-            }
-            return;
-        }
-
-        if (!res.ok) {
-            throw new Error(`API Error: ${res.status} ${res.statusText}`);
-        }
-
-        const data = await res.json();
-        renderHistory(data);
-    } catch (err) {
-        console.error("History Fetch Error:", err);
-        const msg = err.message || 'Failed to fetch history';
-        alert(`Error: ${msg}. Check console for details.`);
-    }
-}
+refreshHistoryBtn.addEventListener('click', fetchDashboard);
 
 function renderHistory(data) {
     historyBody.innerHTML = '';
@@ -375,7 +387,7 @@ function renderHistory(data) {
     }
 
     // Sort by Date and Time Descending (Newest First)
-    data.sort((a, b) => {
+    data = [...data].sort((a, b) => {
         const dateTimeA = `${a.date} ${a.time}`;
         const dateTimeB = `${b.date} ${b.time}`;
         return dateTimeB.localeCompare(dateTimeA);
@@ -1,21 +1,20 @@
 # final backend
-import uvicorn
+import asyncio
+import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime, timedelta
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+# database loads .env, so import it before auth_handler reads JWT settings
+import models, database
 from auth_handler import sign_jwt, decode_token, ACCESS_TOKEN_EXPIRE_MINUTES, REFRESH_TOKEN_EXPIRE_DAYS, JWT_SECRET, JWT_ALGORITHM
 import jwt
 
 from sqlalchemy.orm import Session
 from pydantic import BaseModel, Field
 from typing import Optional
-import models, database
 import bcrypt
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
 
 # --- Pydantic Models for Data Validation ---
 
@@ -45,13 +44,49 @@ class UserLoginSchema(BaseModel):
 
 # --- App Initialization ---
 
-# Create tables if they don't exist
-models.Base.metadata.create_all(bind=database.engine)
+# Readiness state reported by /ready
+startup_state = {"ready": False, "warmed_connections": 0, "warmup_seconds": None, "attempts": 0, "error": None}
+
+# A failed warm-up is retried after 1, 2, 4, ... seconds, capped here
+WARMUP_MAX_BACKOFF_SECONDS = int(os.getenv("WARMUP_MAX_BACKOFF_SECONDS", "60"))
+
+async def warm_up():
+    """Open pool connections in the background, then mark ready. Retries with backoff until it succeeds."""
+    started = time.perf_counter()
+    backoff = 1
+    while True:
+        startup_state["attempts"] += 1
+        try:
+            warmed = await asyncio.to_thread(database.prewarm_pool)
+            break
+        except Exception as e:
+            startup_state["error"] = f"{type(e).__name__}: {e}"
+            print(f"Warm-up attempt {startup_state['attempts']} failed, retrying in {backoff}s: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WARMUP_MAX_BACKOFF_SECONDS)
+
+    startup_state.update({
+        "warmed_connections": warmed,
+        "warmup_seconds": round(time.perf_counter() - started, 3),
+        "error": None,
+        "ready": True
+    })
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables if they don't exist (skipped when APP_ENV=production)
+    await asyncio.to_thread(database.init_schema)
+
+    # Warm up in the background so the server starts accepting requests right away
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
 
 app = FastAPI(
     title="Attendance Auth Server",
     description="Microservice for handling student and faculty authentication with refresh tokens.",
-    version="2.0"
+    version="2.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -69,6 +104,13 @@ app.add_middleware(
 async def root():
     return {"message": "Attendance Auth Server v2.0 with Refresh Tokens. Visit /docs for Swagger UI."}
 
+@app.get("/ready", tags=["General"])
+async def ready(response: Response):
+    """Readiness probe: 503 (with the last warm-up error, if any) until the connection pool is warm."""
+    if not startup_state["ready"]:
+        response.status_code = 503
+    return startup_state
+
 @app.post("/check_student_login", response_model=TokenResponse, tags=["Authentication"])
 async def check_student_login(username: str, password: str, db: Session = Depends(database.get_db)):
     
@@ -174,6 +216,7 @@ async def logout(request: LogoutRequest, db: Session = Depends(database.get_db))
 # --- Main ---
 
 if __name__ == "__main__":
+    import uvicorn
     print("Starting auth server v2.0 on http://localhost:8000")
     print("Documentation available at http://localhost:8000/docs")
     uvicorn.run(app, host="0.0.0.0", port=8000)
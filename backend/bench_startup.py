@@ -0,0 +1,76 @@
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+# Startup-time benchmark: measures time from process start (imports included)
+# to the first served request, and to /ready, for either server.
+# Uses the DATABASE_URL / .env of the server directory, like a normal boot.
+SERVERS = {
+    "auth": "auth_server",
+    "resource": "resource_server",
+}
+
+
+def wait_for(url: str, deadline: float, want_ok: bool = True) -> float:
+    """Poll url until it answers (2xx if want_ok). Returns the time it did, or raises."""
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1):
+                return time.perf_counter()
+        except urllib.error.HTTPError:
+            if not want_ok:
+                return time.perf_counter()
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.01)
+    raise TimeoutError(f"{url} did not answer in time")
+
+
+def run_once(server: str, port: int, mode: str, timeout: float):
+    env = dict(os.environ, APP_ENV=mode)
+    cwd = os.path.join(os.path.dirname(os.path.abspath(__file__)), SERVERS[server])
+    base = f"http://127.0.0.1:{port}"
+
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=cwd, env=env
+    )
+    try:
+        deadline = started + timeout
+        first_request = wait_for(base + "/", deadline)
+        ready = wait_for(base + "/ready", deadline)
+        return first_request - started, ready - started
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure server cold start time.")
+    parser.add_argument("server", choices=SERVERS, help="Which server to boot")
+    parser.add_argument("--mode", default="production", help="APP_ENV for the server (production skips DDL)")
+    parser.add_argument("--runs", type=int, default=5, help="Number of cold starts")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait per start")
+    args = parser.parse_args()
+
+    first, ready = [], []
+    for i in range(args.runs):
+        f, r = run_once(args.server, args.port, args.mode, args.timeout)
+        first.append(f)
+        ready.append(r)
+        print(f"Run {i + 1}: first request {f * 1000:.0f} ms, ready {r * 1000:.0f} ms")
+
+    print(f"\n{args.server} server, APP_ENV={args.mode}, {args.runs} runs")
+    print(f"First request: median {statistics.median(first) * 1000:.0f} ms, max {max(first) * 1000:.0f} ms")
+    print(f"Ready:         median {statistics.median(ready) * 1000:.0f} ms, max {max(ready) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import math
+import os
+import time
+from fastapi import Request, HTTPException
+from auth_bearer import decode_jwt
+
+# --- Configuration (environment variables) ---
+
+# Max DB-bound requests in flight per worker. Keep this below
+# pool_size + max_overflow in database.py so requests never queue on the pool.
+MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "25"))
+
+# Token buckets: sustained requests per second and burst size
+USER_RATE = float(os.getenv("RATE_LIMIT_USER_PER_SEC", "2"))
+USER_BURST = float(os.getenv("RATE_LIMIT_USER_BURST", "10"))
+SECTION_RATE = float(os.getenv("RATE_LIMIT_SECTION_PER_SEC", "50"))
+SECTION_BURST = float(os.getenv("RATE_LIMIT_SECTION_BURST", "250"))
+
+# Idle buckets are dropped once this many are tracked
+MAX_BUCKETS = int(os.getenv("RATE_LIMIT_MAX_BUCKETS", "10000"))
+
+
+class TokenBucket:
+    """Classic token bucket: refills at `rate` tokens/second up to `burst`."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> float:
+        """Take one token. Returns 0 on success, otherwise seconds until one is available."""
+        self.refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else 60.0
+
+
+class RateLimiter:
+    """A set of token buckets keyed by user or section."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.buckets = {}
+
+    def check(self, key: str, now: float) -> float:
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= MAX_BUCKETS:
+                self.prune(now)
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst)
+        return bucket.try_take(now)
+
+    def prune(self, now: float):
+        """Drop buckets that have refilled completely (idle clients)."""
+        for key in list(self.buckets):
+            bucket = self.buckets[key]
+            bucket.refill(now)
+            if bucket.tokens >= bucket.burst:
+                del self.buckets[key]
+
+
+# Rejection and admission counters, exposed through /metrics
+metrics = {
+    "admitted_total": 0,
+    "rejected_in_flight_total": 0,
+    "rejected_user_rate_total": 0,
+    "rejected_section_rate_total": 0,
+    "in_flight": 0,
+    "in_flight_limit": MAX_IN_FLIGHT,
+}
+
+user_limiter = RateLimiter(USER_RATE, USER_BURST)
+section_limiter = RateLimiter(SECTION_RATE, SECTION_BURST)
+
+
+def reject(counter: str, retry_after: float, detail: str):
+    metrics[counter] += 1
+    raise HTTPException(
+        status_code=429,
+        detail=detail,
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
+def client_key(request: Request) -> str:
+    """Identify the caller by JWT user_id, falling back to client IP."""
+    auth = request.headers.get("authorization", "")
+    scheme, _, token = auth.partition(" ")
+    if scheme == "Bearer" and token:
+        payload = decode_jwt(token)
+        if payload and payload.get("user_id"):
+            return "user:" + str(payload["user_id"])
+    return "ip:" + (request.client.host if request.client else "unknown")
+
+
+class AdmissionControl:
+    """
+    FastAPI dependency that admits or rejects DB-bound requests before they
+    touch the connection pool. Over-limit requests get a fast 429 with Retry-After.
+
+    Usage:
+        @app.post("/add_attendance", dependencies=[Depends(admission_control)])
+        async def add_attendance(...):
+            ...
+    """
+
+    def __init__(self, max_in_flight: int = MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+
+    async def __call__(self, request: Request):
+        now = time.monotonic()
+
+        # 1. Per-user token bucket
+        wait = user_limiter.check(client_key(request), now)
+        if wait:
+            reject("rejected_user_rate_total", wait, "Too many requests, slow down.")
+
+        # 2. Per-section token bucket
+        section = request.query_params.get("section")
+        if section:
+            wait = section_limiter.check("section:" + section, now)
+            if wait:
+                reject("rejected_section_rate_total", wait, "Section is busy, retry shortly.")
+
+        # 3. Cap DB-bound requests in flight on this worker
+        if self.in_flight >= self.max_in_flight:
+            reject("rejected_in_flight_total", 1, "Server is busy, retry shortly.")
+
+        self.in_flight += 1
+        metrics["in_flight"] = self.in_flight
+        metrics["admitted_total"] += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            metrics["in_flight"] = self.in_flight
+
+
+admission_control = AdmissionControl()
@@ -0,0 +1,163 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import date, datetime, time as dtime
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+import models
+import bitset_store
+
+# Benchmark: row-per-mark store vs bitset store for one section.
+# ATTENDANCE_STORE=bitset is a dual-write phase: attendance rows are still
+# written next to the bitsets. So the same synthetic semester is built in
+# three temporary SQLite files - rows only, rows + bitsets (what bitset mode
+# stores today) and bitsets only (what it would take once rows are retired) -
+# and file size and stats latency are compared.
+SECTION = "BENCH"
+
+
+def make_session(path: str):
+    engine = create_engine(f"sqlite:///{path}")
+    models.Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(bind=engine)()
+
+
+def build(db_rows, db_dual, db_bits, students: int, sessions: int, subjects: int, presence: float):
+    usernames = [f"student{i:04d}@college.org" for i in range(students)]
+    subject_names = [f"SUBJECT-{i}" for i in range(subjects)]
+    rng = random.Random(42)
+
+    for db in (db_dual, db_bits):
+        db.add_all([
+            models.SectionRoster(section=SECTION, username=u, idx=i) for i, u in enumerate(usernames)
+        ])
+
+    marks = 0
+    for n in range(sessions):
+        subject = subject_names[n % subjects]
+        start = datetime(2024, 1, 1, 9, 0)
+        present = [i for i in range(students) if rng.random() < presence]
+        marks += len(present)
+
+        bits = b""
+        for i in present:
+            bits = bitset_store.set_bit(bits, i)
+
+        db_rows.add(models.AttendanceSession(section=SECTION, subject=subject, is_active=False, start_time=start))
+        for db in (db_dual, db_bits):
+            db.add(models.AttendanceSession(
+                section=SECTION, subject=subject, is_active=False, start_time=start, attendee_bits=bits
+            ))
+
+        for db in (db_rows, db_dual):
+            db.bulk_insert_mappings(models.AttendanceRecord, [
+                {
+                    "section": SECTION,
+                    "username": usernames[i],
+                    "subject": subject,
+                    "status": "Present",
+                    "date": date(2024, 1, 1),
+                    "time": dtime(9, 5),
+                }
+                for i in present
+            ])
+
+    for db in (db_rows, db_dual, db_bits):
+        db.commit()
+    return marks
+
+
+def row_stats(db):
+    """Row store stats, aggregated in SQL like /get_dashboard does."""
+    totals = dict(db.query(
+        models.AttendanceSession.subject, func.count(models.AttendanceSession.id)
+    ).filter(models.AttendanceSession.section == SECTION).group_by(models.AttendanceSession.subject).all())
+
+    result = []
+    for username, subject, attended in db.query(
+        models.AttendanceRecord.username,
+        models.AttendanceRecord.subject,
+        func.count(models.AttendanceRecord.id)
+    ).filter(
+        models.AttendanceRecord.section == SECTION,
+        models.AttendanceRecord.status == "Present"
+    ).group_by(models.AttendanceRecord.username, models.AttendanceRecord.subject).all():
+        total = totals.get(subject, 0)
+        result.append({
+            "username": username,
+            "subject": subject,
+            "attended": attended,
+            "total": total,
+            "percentage": round(attended / total * 100, 2) if total else 0.0
+        })
+    return result
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def file_size(engine, path: str) -> int:
+    with engine.connect() as conn:
+        conn.exec_driver_sql("VACUUM")
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare row-per-mark and bitset attendance stores.")
+    parser.add_argument("--students", type=int, default=300)
+    parser.add_argument("--sessions", type=int, default=600, help="Classes in the semester")
+    parser.add_argument("--subjects", type=int, default=6)
+    parser.add_argument("--presence", type=float, default=0.8, help="Chance a student attends a class")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = {name: os.path.join(tmp, f"{name}.db") for name in ("rows", "dual", "bits")}
+        engines, dbs = {}, {}
+        for name, path in paths.items():
+            engines[name], dbs[name] = make_session(path)
+
+        print("Building synthetic semester...")
+        marks = build(dbs["rows"], dbs["dual"], dbs["bits"], args.students, args.sessions, args.subjects, args.presence)
+
+        # Both stores must agree before we compare speed
+        key = lambda r: (r["username"], r["subject"])
+        assert sorted(row_stats(dbs["rows"]), key=key) == sorted(bitset_store.section_stats(dbs["dual"], SECTION), key=key)
+
+        rows_time = timed(lambda: row_stats(dbs["rows"]), args.repeat)
+        bits_time = timed(lambda: bitset_store.section_stats(dbs["dual"], SECTION), args.repeat)
+        defaulters_time = timed(lambda: bitset_store.defaulters(dbs["dual"], SECTION), args.repeat)
+
+        sizes = {}
+        for name, path in paths.items():
+            dbs[name].close()
+            sizes[name] = file_size(engines[name], path)
+            engines[name].dispose()
+
+    print(f"\n{args.students} students x {args.sessions} sessions, {marks} marks")
+    print(f"{'':<30}{'storage':>14}{'stats (median)':>18}")
+    print(f"{'rows':<30}{sizes['rows'] / 1024:>11.0f} KB{rows_time * 1000:>15.1f} ms")
+    print(f"{'rows + bitset (bitset mode)':<30}{sizes['dual'] / 1024:>11.0f} KB{bits_time * 1000:>15.1f} ms")
+    print(f"{'bitset only (projected)':<30}{sizes['bits'] / 1024:>11.0f} KB{'-':>18}")
+    print(
+        f"\nBitset mode (dual write): storage {sizes['dual'] / sizes['rows']:.2f}x of rows "
+        f"(+{(sizes['dual'] - sizes['rows']) / 1024:.0f} KB), stats {rows_time / bits_time:.1f}x faster"
+    )
+    print(
+        f"Bitset only would be {sizes['rows'] / sizes['bits']:.1f}x smaller than rows, but rows are "
+        f"still written for history, the dashboard cursor and exports"
+    )
+    print(f"Defaulters (bitset): {defaulters_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
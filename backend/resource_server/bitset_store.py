@@ -0,0 +1,205 @@
+import os
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import models
+
+# Optional compact attendance store. Each section has a roster mapping
+# username -> bit index, and each AttendanceSession keeps a packed bitset
+# of attendees (bit i of byte i // 8, least significant bit first).
+# Stats are computed with NumPy over the session x student bit matrix.
+#
+# ATTENDANCE_STORE=bitset writes the bitset alongside each attendance row
+# and serves stats from it. NumPy is only needed in that mode.
+#
+# This mode only makes stats faster. It does NOT reduce storage: rows are
+# still written (history, the dashboard cursor and exports need them), so
+# the bitsets are a small addition on top (see bench_bitset.py).
+ENABLED = os.getenv("ATTENDANCE_STORE", "rows").lower() == "bitset"
+
+# Minimum percentage to not be a defaulter
+DEFAULTER_THRESHOLD = float(os.getenv("DEFAULTER_THRESHOLD", "75"))
+
+
+def set_bit(bits: bytes, idx: int) -> bytes:
+    """Return a copy of `bits` with bit `idx` set, growing it if needed."""
+    data = bytearray(bits or b"")
+    byte = idx >> 3
+    if byte >= len(data):
+        data.extend(b"\x00" * (byte + 1 - len(data)))
+    data[byte] |= 1 << (idx & 7)
+    return bytes(data)
+
+
+def lock_roster(db: Session, section: str):
+    """
+    Serialize roster index assignment for a section until the transaction
+    ends (Postgres advisory lock). Other databases serialize writers anyway.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(select(func.pg_advisory_xact_lock(func.hashtext("section_roster:" + section))))
+
+
+def roster_lookup(db: Session, section: str, username: str):
+    entry = db.query(models.SectionRoster.idx).filter(
+        models.SectionRoster.section == section,
+        models.SectionRoster.username == username
+    ).first()
+    return entry.idx if entry else None
+
+
+def roster_index(db: Session, section: str, username: str) -> int:
+    """Bit index of a student in a section, assigning the next free one if new."""
+    idx = roster_lookup(db, section, username)
+    if idx is not None:
+        return idx
+
+    # First mark of this student in the section: take the roster lock so
+    # concurrent first marks don't all pick the same max + 1, then re-check
+    lock_roster(db, section)
+    for attempt in range(3):
+        idx = roster_lookup(db, section, username)
+        if idx is not None:
+            return idx
+
+        next_idx = db.query(func.coalesce(func.max(models.SectionRoster.idx) + 1, 0)).filter(
+            models.SectionRoster.section == section
+        ).scalar()
+
+        # Writers that skip the lock can still take the same index; the unique constraints reject it
+        try:
+            with db.begin_nested():
+                db.add(models.SectionRoster(section=section, username=username, idx=next_idx))
+            return next_idx
+        except IntegrityError:
+            if attempt == 2:
+                raise
+
+
+def mark_present(db: Session, section: str, username: str, subject: str) -> bool:
+    """
+    Set the student's bit on the active session of the section. Does not commit.
+    Returns False if no matching session is active.
+    """
+    # Resolve the bit index first, so the session row is only locked by the UPDATE below
+    idx = roster_index(db, section, username)
+
+    sessions = models.AttendanceSession
+    filters = [
+        sessions.section == section,
+        sessions.is_active == True,
+        sessions.subject == subject
+    ]
+
+    if db.get_bind().dialect.name == "postgresql":
+        # Set the bit in SQL, padding the bytea with zero bytes up to idx first,
+        # so a mark holds the session row lock only from this UPDATE to the commit.
+        # Postgres set_bit numbers bits LSB first within each byte, like set_bit() here.
+        current = func.coalesce(sessions.attendee_bits, func.decode("", "hex"))
+        padding = func.decode(func.repeat("00", func.greatest(0, idx // 8 + 1 - func.length(current))), "hex")
+        stmt = update(sessions).where(*filters).values(
+            attendee_bits=func.set_bit(current.op("||")(padding), idx, 1)
+        ).returning(sessions.id)
+        return db.execute(stmt).first() is not None
+
+    # Other databases (SQLite) serialize writers anyway: read-modify-write under a row lock
+    session = db.query(sessions).filter(*filters).with_for_update().first()
+    if not session:
+        return False
+    session.attendee_bits = set_bit(session.attendee_bits, idx)
+    return True
+
+
+def load_matrix(db: Session, section: str, subjects=None):
+    """
+    Load a section as (usernames, subjects, matrix) where matrix is a
+    bool array of shape (sessions, students) and subjects[i] is the
+    subject of session row i. Pass `subjects` to load only those sessions.
+    """
+    import numpy as np
+
+    roster = db.query(models.SectionRoster.idx, models.SectionRoster.username).filter(
+        models.SectionRoster.section == section
+    ).all()
+    n_students = max((r.idx for r in roster), default=-1) + 1
+    usernames = [None] * n_students
+    for r in roster:
+        usernames[r.idx] = r.username
+
+    sessions_query = db.query(
+        models.AttendanceSession.subject,
+        models.AttendanceSession.attendee_bits
+    ).filter(
+        models.AttendanceSession.section == section
+    )
+    if subjects is not None:
+        sessions_query = sessions_query.filter(models.AttendanceSession.subject.in_(subjects))
+    sessions = sessions_query.all()
+
+    # Pack every bitset into one (sessions, bytes) array, zero padded
+    n_bytes = (n_students + 7) // 8
+    packed = np.zeros((len(sessions), n_bytes), dtype=np.uint8)
+    for i, s in enumerate(sessions):
+        if s.attendee_bits:
+            row = np.frombuffer(s.attendee_bits[:n_bytes], dtype=np.uint8)
+            packed[i, :len(row)] = row
+
+    matrix = np.unpackbits(packed, axis=1, count=n_students, bitorder="little").astype(bool)
+    subjects = np.array([s.subject for s in sessions], dtype=object)
+    return usernames, subjects, matrix
+
+
+def section_stats(db: Session, section: str, subjects=None) -> list:
+    """
+    Same output as /get_all_student_stats, computed from the bitsets.
+    Pass `subjects` to compute only those subjects.
+    """
+    import numpy as np
+
+    usernames, subjects, matrix = load_matrix(db, section, subjects)
+
+    result = []
+    for subject in sorted(set(subjects)):
+        rows = subjects == subject
+        total = int(rows.sum())
+        attended = matrix[rows].sum(axis=0)
+        percentage = np.round(attended / total * 100, 2)
+
+        # Like the row store, only students with at least one mark are listed
+        for idx in np.flatnonzero(attended):
+            result.append({
+                "username": usernames[idx],
+                "subject": subject,
+                "attended": int(attended[idx]),
+                "total": total,
+                "percentage": float(percentage[idx])
+            })
+    return result
+
+
+def defaulters(db: Session, section: str, threshold: float = DEFAULTER_THRESHOLD) -> list:
+    """Stats of students below `threshold` percent in a subject, lowest first."""
+    import numpy as np
+
+    usernames, subjects, matrix = load_matrix(db, section)
+
+    result = []
+    for subject in sorted(set(subjects)):
+        rows = subjects == subject
+        total = int(rows.sum())
+        attended = matrix[rows].sum(axis=0)
+        percentage = attended / total * 100
+
+        for idx in np.flatnonzero(percentage < threshold):
+            if usernames[idx] is None:
+                continue
+            result.append({
+                "username": usernames[idx],
+                "subject": subject,
+                "attended": int(attended[idx]),
+                "total": total,
+                "percentage": round(float(percentage[idx]), 2)
+            })
+
+    result.sort(key=lambda r: r["percentage"])
+    return result
@@ -0,0 +1,45 @@
+import gzip
+import json
+from fastapi import Request, Response
+
+# Brotli is optional - fall back to gzip if the package is not installed
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Payloads smaller than this are not worth compressing
+MINIMUM_SIZE = 500
+
+
+def accepted_encodings(request: Request) -> set:
+    """Parse the Accept-Encoding header into a set of encodings (ignores q=0)."""
+    encodings = set()
+    for part in request.headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if not token:
+            continue
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        encodings.add(token.strip().lower())
+    return encodings
+
+
+def compressed_json_response(request: Request, payload) -> Response:
+    """
+    Serialize payload to JSON and compress it with brotli or gzip,
+    depending on what the client accepts.
+    """
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    headers = {"Vary": "Accept-Encoding"}
+
+    if len(body) >= MINIMUM_SIZE:
+        encodings = accepted_encodings(request)
+        if brotli is not None and "br" in encodings:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in encodings:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,106 @@
+import argparse
+import random
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+import models, database
+import session_control
+
+# Fires parallel start/stop calls at the database in DATABASE_URL and checks
+# that at most one session per section is ever active and no start is lost.
+# Point it at a local database, it creates and deletes its own rows.
+SECTION = "__concurrency_check__"
+
+
+def run_start(i: int):
+    """Returns the new session id, or None if every retry lost the race."""
+    db = database.SessionLocal()
+    try:
+        return session_control.start_session(db, SECTION, f"subject-{i}")
+    except IntegrityError:
+        return None
+    finally:
+        db.close()
+
+
+def run_stop(i: int):
+    db = database.SessionLocal()
+    try:
+        session_control.stop_session(db, SECTION)
+    finally:
+        db.close()
+
+
+def counts():
+    db = database.SessionLocal()
+    try:
+        total = db.query(func.count(models.AttendanceSession.id)).filter(
+            models.AttendanceSession.section == SECTION
+        ).scalar()
+        active = db.query(models.AttendanceSession.id).filter(
+            models.AttendanceSession.section == SECTION,
+            models.AttendanceSession.is_active == True
+        ).all()
+        return total, [row.id for row in active]
+    finally:
+        db.close()
+
+
+def cleanup():
+    db = database.SessionLocal()
+    try:
+        db.query(models.AttendanceSession).filter(
+            models.AttendanceSession.section == SECTION
+        ).delete(synchronize_session=False)
+        db.commit()
+    finally:
+        db.close()
+
+
+def check(label: str, ok: bool, detail: str) -> bool:
+    print(f"[{'PASS' if ok else 'FAIL'}] {label}: {detail}")
+    return ok
+
+
+def main(workers: int, calls: int) -> bool:
+    models.Base.metadata.create_all(bind=database.engine)
+    cleanup()
+    passed = True
+
+    try:
+        # 1. Parallel starts only: every start is stored, exactly one stays active
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            started = [sid for sid in pool.map(run_start, range(calls)) if sid is not None]
+        total, active = counts()
+        passed &= check("starts succeeded", len(started) > 0, f"{len(started)} of {calls} starts committed")
+        passed &= check("parallel starts", total == len(started), f"{len(started)} started, {total} rows")
+        passed &= check("one active after starts", len(active) == 1, f"active ids {active}")
+        passed &= check("last start wins", active == [max(started)] if started else False, f"newest id {max(started, default=None)}")
+
+        # 2. Interleaved starts and stops: never more than one active
+        ops = [run_start if random.random() < 0.5 else run_stop for _ in range(calls)]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda p: p[1](p[0]), enumerate(ops)))
+        started += [sid for op, sid in zip(ops, results) if op is run_start and sid is not None]
+        total, active = counts()
+        passed &= check("mixed start/stop", total == len(started), f"{len(started)} started, {total} rows")
+        passed &= check("at most one active", len(active) <= 1, f"active ids {active}")
+
+        # 3. Parallel stops: nothing left active
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(run_stop, range(workers)))
+        total, active = counts()
+        passed &= check("none active after stops", not active, f"active ids {active}")
+    finally:
+        cleanup()
+
+    print("\nALL CHECKS PASSED" if passed else "\nSOME CHECKS FAILED")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency check for start/stop attendance session.")
+    parser.add_argument("--workers", type=int, default=16, help="Parallel threads")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per phase")
+    args = parser.parse_args()
+    raise SystemExit(0 if main(args.workers, args.calls) else 1)
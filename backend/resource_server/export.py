@@ -0,0 +1,319 @@
+import argparse
+import csv
+import io
+import tempfile
+import time
+from sqlalchemy import select
+import models, database
+from session_matching import created_local, latest_started, session_start
+
+# Bulk attendance export. Rows are read from a server-side cursor in chunks
+# and handed to a format writer chunk by chunk, so memory stays bounded
+# regardless of semester size. Output is produced as a stream of bytes.
+
+FORMATS = ("csv", "xlsx", "parquet")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "parquet": "application/vnd.apache.parquet",
+}
+CHUNK_SIZE = 5000
+# The XLSX zip is only built on close; it is streamed back in reads of this size
+READ_SIZE = 64 * 1024
+
+FLAT_COLUMNS = ["section", "username", "subject", "status", "date", "time"]
+
+
+class BufferSink:
+    """Write-only file object whose contents are drained after every chunk."""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self.buffer += data
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return False
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = bytes(self.buffer)
+        self.buffer.clear()
+        return data
+
+
+# Writers take a BufferSink and the column names. write_rows() writes into the
+# sink, close() is a generator of the remaining output.
+
+class CSVWriter:
+    def __init__(self, sink: BufferSink, columns: list):
+        self.sink = sink
+        self.text = io.TextIOWrapper(sink, encoding="utf-8", newline="", write_through=True)
+        self.writer = csv.writer(self.text)
+        self.writer.writerow(columns)
+
+    def write_rows(self, rows: list):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.text.flush()
+        self.text.detach()
+        yield self.sink.drain()
+
+
+class XLSXWriter:
+    """
+    openpyxl write-only workbook; rows are spooled to disk, the zip is built
+    on close and read back READ_SIZE bytes at a time, bypassing the sink.
+    """
+
+    def __init__(self, sink: BufferSink, columns: list):
+        from openpyxl import Workbook
+
+        self.sink = sink
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet("Attendance")
+        self.sheet.append(columns)
+
+    def write_rows(self, rows: list):
+        for row in rows:
+            self.sheet.append(row)
+
+    def close(self):
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as spool:
+            self.workbook.save(spool)
+            spool.seek(0)
+            while True:
+                data = spool.read(READ_SIZE)
+                if not data:
+                    break
+                yield data
+
+
+class ParquetWriter:
+    """pyarrow ParquetWriter; every chunk becomes a row group."""
+
+    def __init__(self, sink: BufferSink, columns: list, pivot: bool = False):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.sink = sink
+        fields = [pa.field(c, pa.string()) for c in columns]
+        if pivot:
+            # Session columns hold 0/1 marks
+            fields = fields[:2] + [pa.field(c, pa.int8()) for c in columns[2:]]
+        self.schema = pa.schema(fields)
+        self.writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), self.schema)
+
+    def write_rows(self, rows: list):
+        # By position, not name: pivot column labels are not guaranteed unique
+        columns = list(zip(*rows)) if rows else [[] for _ in self.schema]
+        self.writer.write_table(self.pa.Table.from_arrays(
+            [self.pa.array(list(values), type=field.type) for field, values in zip(self.schema, columns)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+        yield self.sink.drain()
+
+
+def section_filters(column, section: str = None, department: str = None) -> list:
+    """Sections are named per department (e.g. 'CS-A'), so a department is the part before the '-'."""
+    filters = []
+    if section:
+        filters.append(column == section)
+    if department:
+        filters.append(column.startswith(department + "-", autoescape=True))
+    return filters
+
+
+def iter_chunks(db, stmt, chunk_size: int, stats: dict):
+    """Stream a SELECT from a server-side cursor, chunk_size rows at a time."""
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        stats["rows_read"] += len(partition)
+        yield partition
+
+
+def flat_chunks(db, filters: list, chunk_size: int, stats: dict):
+    r = models.AttendanceRecord
+    stmt = select(r.section, r.username, r.subject, r.status, r.date, r.time).where(*filters).order_by(r.id)
+
+    for chunk in iter_chunks(db, stmt, chunk_size, stats):
+        yield [
+            (
+                row.section,
+                row.username,
+                row.subject,
+                row.status,
+                row.date.strftime("%Y-%m-%d") if row.date else "",
+                row.time.strftime("%H:%M:%S") if row.time else ""
+            )
+            for row in chunk
+        ]
+
+
+def session_columns(db, section: str = None, department: str = None) -> list:
+    """One pivot column per session held: (section, subject, start_time), in start order."""
+    sessions = models.AttendanceSession
+    rows = db.execute(
+        select(sessions.section, sessions.subject, sessions.start_time).where(
+            *section_filters(sessions.section, section, department)
+        ).order_by(sessions.id)
+    ).all()
+    return sorted(
+        [(row.section, row.subject, row.start_time) for row in rows],
+        key=lambda c: session_start(c[2])
+    )
+
+
+def pivot_chunks(db, filters: list, classes: list, chunk_size: int, stats: dict):
+    """
+    Student x session matrix. Marks are read ordered by student, so one
+    student's row is complete once the next student starts. Marks are
+    matched to sessions with session_matching; marks with no session are
+    counted in stats["unmatched"].
+    """
+    r = models.AttendanceRecord
+    starts_of = {}
+    for column, (section, subject, start) in enumerate(classes):
+        starts, columns = starts_of.setdefault((section, subject), ([], []))
+        starts.append(session_start(start))
+        columns.append(column)
+
+    stmt = select(
+        r.section, r.username, r.subject, r.date, r.time, created_local(db).label("created_local")
+    ).where(*filters, r.status == "Present").order_by(r.section, r.username)
+
+    stats["unmatched"] = 0
+    current, marks, out = None, None, []
+    for chunk in iter_chunks(db, stmt, chunk_size, stats):
+        for row in chunk:
+            student = (row.section, row.username)
+            if student != current:
+                if current:
+                    out.append(current + tuple(marks))
+                current, marks = student, [0] * len(classes)
+
+            starts, columns = starts_of.get((row.section, row.subject), ([], []))
+            i = latest_started(starts, row)
+            if i < 0:
+                stats["unmatched"] += 1
+                continue
+            marks[columns[i]] = 1
+
+        if out:
+            yield out
+            out = []
+
+    if current:
+        yield [current + tuple(marks)]
+
+
+def export_attendance(fmt: str, section: str = None, department: str = None,
+                      pivot: bool = False, chunk_size: int = CHUNK_SIZE, stats: dict = None):
+    """
+    Generate the export as byte chunks. Opens its own DB session so it can
+    outlive the request dependency when used in a StreamingResponse.
+    Fills `stats` with rows written, rows_read from the DB, seconds and
+    rows_per_second (rows read, so pivoted and flat exports compare) when done,
+    and for pivots the number of unmatched marks.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    stats = stats if stats is not None else {}
+    stats["rows_read"] = 0
+    started = time.perf_counter()
+    rows = 0
+
+    db = database.SessionLocal()
+    try:
+        filters = section_filters(models.AttendanceRecord.section, section, department)
+        if pivot:
+            classes = session_columns(db, section, department)
+            labels = [f"{start.strftime('%Y-%m-%d %H:%M:%S') if start else ''} {subject}" for _, subject, start in classes]
+            if not section:
+                # Department exports hold every section's sessions side by side
+                labels = [f"{sec} {label}" for (sec, _, _), label in zip(classes, labels)]
+            columns = ["section", "username"] + labels
+            chunks = pivot_chunks(db, filters, classes, chunk_size, stats)
+        else:
+            columns = FLAT_COLUMNS
+            chunks = flat_chunks(db, filters, chunk_size, stats)
+
+        sink = BufferSink()
+        if fmt == "csv":
+            writer = CSVWriter(sink, columns)
+        elif fmt == "xlsx":
+            writer = XLSXWriter(sink, columns)
+        else:
+            writer = ParquetWriter(sink, columns, pivot)
+
+        for chunk in chunks:
+            writer.write_rows(chunk)
+            rows += len(chunk)
+            data = sink.drain()
+            if data:
+                yield data
+
+        for data in writer.close():
+            if data:
+                yield data
+    finally:
+        db.close()
+
+    seconds = time.perf_counter() - started
+    stats.update({
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_second": round(stats["rows_read"] / seconds) if seconds > 0 else stats["rows_read"]
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export attendance to CSV, XLSX or Parquet.")
+    parser.add_argument("output", help="Output file path")
+    parser.add_argument("--format", choices=FORMATS, help="Output format (default: from the file extension)")
+    parser.add_argument("--section", help="Export a single section")
+    parser.add_argument("--department", help="Export every section of a department (CS exports CS-A, CS-B, ...)")
+    parser.add_argument("--pivot", action="store_true", help="Student x session matrix instead of one row per mark")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or args.output.rsplit(".", 1)[-1].lower()
+    if fmt not in FORMATS:
+        parser.error(f"Cannot infer format from {args.output}, pass --format")
+
+    stats = {}
+    with open(args.output, "wb") as f:
+        for data in export_attendance(fmt, args.section, args.department, args.pivot, args.chunk_size, stats):
+            f.write(data)
+
+    print(
+        f"Exported {stats['rows']} rows ({stats['rows_read']} read) to {args.output} "
+        f"in {stats['seconds']}s ({stats['rows_per_second']} rows/s)"
+    )
+    if stats.get("unmatched"):
+        print(f"{stats['unmatched']} marks had no session and were left out of the pivot")
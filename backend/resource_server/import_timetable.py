@@ -0,0 +1,136 @@
+import argparse
+import os
+from datetime import datetime, time
+import pandas as pd
+import models, database
+
+# Expected columns (case-insensitive): section, day, start_time, end_time, subject
+# Day may be a name ("Mon", "Monday") or a number (0 = Monday)
+DAYS = ["mon", "tue", "wed", "thu", "fri", "sat", "sun"]
+
+
+def parse_day(value) -> int:
+    text = str(value).strip().lower()
+    if text.isdigit() and 0 <= int(text) <= 6:
+        return int(text)
+    if text[:3] in DAYS:
+        return DAYS.index(text[:3])
+    raise ValueError(f"Unknown day: {value}")
+
+
+def parse_time(value) -> time:
+    # Excel cells come back as datetime.time, CSV cells as strings
+    if isinstance(value, time):
+        return value
+    if isinstance(value, datetime):
+        return value.time()
+    text = str(value).strip()
+    for fmt in ("%H:%M", "%H:%M:%S", "%I:%M %p"):
+        try:
+            return datetime.strptime(text, fmt).time()
+        except ValueError:
+            continue
+    raise ValueError(f"Unknown time: {value}")
+
+
+def read_slots(path: str):
+    if path.lower().endswith(".csv"):
+        df = pd.read_csv(path)
+    else:
+        df = pd.read_excel(path)
+
+    # Clean column names
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+
+    slots = []
+    for index, row in df.iterrows():
+        section = str(row["section"]).strip()
+        subject = str(row["subject"]).strip()
+        if not section or section == "nan" or not subject or subject == "nan":
+            continue
+
+        slot = models.TimetableSlot(
+            section=section,
+            subject=subject,
+            day_of_week=parse_day(row["day"]),
+            start_time=parse_time(row["start_time"]),
+            end_time=parse_time(row["end_time"])
+        )
+        if slot.end_time <= slot.start_time:
+            raise ValueError(f"Row {index + 2}: end_time must be after start_time")
+        slots.append(slot)
+
+    check_overlaps(slots)
+    return slots
+
+
+def check_overlaps(slots):
+    """The scheduler expects at most one class per section at a time."""
+    by_key = {}
+    for slot in slots:
+        by_key.setdefault((slot.section, slot.day_of_week), []).append(slot)
+
+    for (section, day), day_slots in by_key.items():
+        day_slots.sort(key=lambda s: s.start_time)
+        for prev, cur in zip(day_slots, day_slots[1:]):
+            if cur.start_time < prev.end_time:
+                raise ValueError(
+                    f"Section {section}, {DAYS[day]}: {prev.subject} and {cur.subject} overlap"
+                )
+
+
+def import_timetable(path: str):
+    if not os.path.exists(path):
+        print(f"Error: Timetable file not found at {path}")
+        return
+
+    print("Reading timetable...")
+    try:
+        slots = read_slots(path)
+    except Exception as e:
+        print(f"Failed to read timetable: {e}")
+        return
+
+    sections = {slot.section for slot in slots}
+
+    db = database.SessionLocal()
+    try:
+        # Replace the timetable of every section present in the file. Slots are
+        # matched on (section, day, start time) and updated in place, so their ids
+        # stay stable: sessions the scheduler already opened keep pointing at them
+        # and are not opened again under a new id.
+        existing = {
+            (slot.section, slot.day_of_week, slot.start_time): slot
+            for slot in db.query(models.TimetableSlot).filter(models.TimetableSlot.section.in_(sections))
+        }
+
+        added = updated = 0
+        for slot in slots:
+            current = existing.pop((slot.section, slot.day_of_week, slot.start_time), None)
+            if current is None:
+                db.add(slot)
+                added += 1
+            elif (current.subject, current.end_time) != (slot.subject, slot.end_time):
+                current.subject = slot.subject
+                current.end_time = slot.end_time
+                updated += 1
+
+        # Slots no longer in the file
+        for slot in existing.values():
+            db.delete(slot)
+        db.commit()
+    finally:
+        db.close()
+
+    print(
+        f"\nSUCCESS! Imported {len(slots)} slots for {len(sections)} sections "
+        f"({added} added, {updated} updated, {len(existing)} removed)."
+    )
+    print("Running servers pick up the new timetable on their next reload.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import a class timetable from CSV or Excel.")
+    parser.add_argument("path", help="Path to a .csv, .xlsx or .xls timetable")
+    args = parser.parse_args()
+    import_timetable(args.path)
@@ -1,18 +1,28 @@
 # final backend
-from typing import List
-import uvicorn
-from fastapi import FastAPI, Depends, HTTPException
+from typing import Dict, List
+import asyncio
+import os
+import time as clock
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, timedelta
 import models, database
 from auth_bearer import JWTBearer
-from dotenv import load_dotenv
+from compression import compressed_json_response
+from admission import admission_control, metrics as admission_metrics
+import scheduler
+import session_control
+import bitset_store
+import export
 
-# Load environment variables from .env file
-load_dotenv()
+# Environment variables are loaded from .env once, in database.py
 
 # --- Pydantic Models for Data Validation ---
 
@@ -49,15 +59,81 @@ class StudentStatsResponse(BaseModel):
     total: int
     percentage: float
 
+class ActiveSessionState(BaseModel):
+    status: bool
+    subject: Optional[str] = None
+    start_time: Optional[str] = None
+
+class DashboardRecordResponse(AttendanceRecordResponse):
+    id: int
+
+class DashboardResponse(BaseModel):
+    cursor: str
+    full: bool
+    session: ActiveSessionState
+    totals: Dict[str, int]
+    stats: List[StudentStatsResponse]
+    history: List[DashboardRecordResponse]
+
 # --- App Initialization ---
 
-# Create tables if they don't exist
-models.Base.metadata.create_all(bind=database.engine)
+# Delta syncs re-read marks created this many seconds before the cursor, to catch
+# transactions that were still open (not yet visible) during the previous sync
+DASHBOARD_SYNC_WINDOW_SECONDS = int(os.getenv("DASHBOARD_SYNC_WINDOW_SECONDS", "60"))
+
+# Readiness state reported by /ready
+startup_state = {"ready": False, "warmed_connections": 0, "warmup_seconds": None, "attempts": 0, "error": None}
+
+# A failed warm-up is retried after 1, 2, 4, ... seconds, capped here
+WARMUP_MAX_BACKOFF_SECONDS = int(os.getenv("WARMUP_MAX_BACKOFF_SECONDS", "60"))
+
+async def warm_up():
+    """
+    Open pool connections and build the timetable index concurrently, then mark ready.
+    Until an attempt succeeds /ready stays 503 and reports the last error, and the
+    scheduler loops are not started.
+    """
+    started = clock.perf_counter()
+    backoff = 1
+    while True:
+        startup_state["attempts"] += 1
+        try:
+            warmed, _ = await asyncio.gather(
+                asyncio.to_thread(database.prewarm_pool),
+                asyncio.to_thread(scheduler.load_timetable)
+            )
+            break
+        except Exception as e:
+            startup_state["error"] = f"{type(e).__name__}: {e}"
+            print(f"Warm-up attempt {startup_state['attempts']} failed, retrying in {backoff}s: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WARMUP_MAX_BACKOFF_SECONDS)
+
+    startup_state.update({
+        "warmed_connections": warmed,
+        "warmup_seconds": round(clock.perf_counter() - started, 3),
+        "error": None,
+        "ready": True
+    })
+
+    # Keep sessions in sync with the timetable, and the active-session map with the DB
+    await asyncio.gather(scheduler.run_scheduler(), scheduler.run_active_session_refresh())
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Create tables if they don't exist (skipped when APP_ENV=production)
+    await asyncio.to_thread(database.init_schema)
+
+    # Warm up in the background so the server starts accepting requests right away
+    task = asyncio.create_task(warm_up())
+    yield
+    task.cancel()
 
 app = FastAPI(
     title="Attendance Resource Server",
     description="Handles attendance sessions, SSID management, and attendance records.",
-    version="3.0"
+    version="3.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -75,7 +151,19 @@ app.add_middleware(
 async def root():
     return {"message": "Attendance Resource Server is running. Visit /docs for Swagger UI."}
 
-@app.get("/get_class_ssid", response_model=SSIDResponse, tags=["Resources"])
+@app.get("/ready", tags=["General"])
+async def ready(response: Response):
+    """Readiness probe: 503 (with the last warm-up error, if any) until the connection pool is warm and the timetable is loaded."""
+    if not startup_state["ready"]:
+        response.status_code = 503
+    return startup_state
+
+@app.get("/metrics", tags=["General"])
+async def get_metrics():
+    """Admission control counters (admitted, rejected by reason, in-flight) for this worker."""
+    return admission_metrics
+
+@app.get("/get_class_ssid", response_model=SSIDResponse, tags=["Resources"], dependencies=[Depends(admission_control)])
 async def get_class_ssid(
     section: str, 
     credentials: dict = Depends(JWTBearer()),
@@ -88,7 +176,7 @@ async def get_class_ssid(
     
     return {"ssid": valid_hotspot.ssid if valid_hotspot else None}
 
-@app.post("/update_class_ssid", response_model=Validated, tags=["Faculty"])
+@app.post("/update_class_ssid", response_model=Validated, tags=["Faculty"], dependencies=[Depends(admission_control)])
 async def update_class_ssid(
     data: UpdateSSID,
     credentials: dict = Depends(JWTBearer()),
@@ -112,13 +200,18 @@ async def update_class_ssid(
     db.commit()
     return {"status": True}
 
-@app.get("/check_attendance_session", response_model=AttendanceSession, tags=["Resources"])
+@app.get("/check_attendance_session", response_model=AttendanceSession, tags=["Resources"], dependencies=[Depends(admission_control)])
 async def check_attendance_session(
     section: str,
     credentials: dict = Depends(JWTBearer()),
     db: Session = Depends(database.get_db)
 ):
     """Check if an attendance session is active. Requires authentication."""
+    # Same source as /get_current_class, so the two endpoints always agree
+    if session_control.active_sessions.ready:
+        return {"status": session_control.active_sessions.get(section) is not None}
+
+    # Before the first refresh, ask the DB
     session = db.query(models.AttendanceSession).filter(
         models.AttendanceSession.section == section,
         models.AttendanceSession.is_active == True
@@ -126,8 +219,8 @@ async def check_attendance_session(
     
     return {"status": True if session else False}
 
-@app.post("/add_attendance", response_model=AttendanceAdd, tags=["Attendance"])
-async def add_attendance(
+@app.post("/add_attendance", response_model=AttendanceAdd, tags=["Attendance"], dependencies=[Depends(admission_control)])
+def add_attendance(
     section: str,
     username: str,
     subject: str,
@@ -137,6 +230,8 @@ async def add_attendance(
     db: Session = Depends(database.get_db)
 ):
     """Mark attendance for a student. Requires authentication."""
+    # Plain def: FastAPI runs it in the threadpool, so waiting on the session
+    # row lock (bitset mode) does not block the event loop.
     # Parse date and time strings to Python objects
     try:
         dt_date = datetime.strptime(date, "%Y-%m-%d").date()
@@ -157,18 +252,27 @@ async def add_attendance(
     )
 
     db.add(new_record)
+    if bitset_store.ENABLED:
+        bitset_store.mark_present(db, section, username, subject)
     db.commit()
     return {"status": True}
 
 
 
-@app.get("/get_current_class", response_model=CurrentClassResponse, tags=["Resources"])
+@app.get("/get_current_class", response_model=CurrentClassResponse, tags=["Resources"], dependencies=[Depends(admission_control)])
 async def get_current_class(
     section: str,
     credentials: dict = Depends(JWTBearer()),
     db: Session = Depends(database.get_db)
 ):
     """Get current active class subject. Requires authentication."""
+    # Answered from the in-memory active-session map, no DB access. It follows
+    # the actual session state, so a stopped or manually replaced class is not reported.
+    if session_control.active_sessions.ready:
+        subject = session_control.active_sessions.get(section)
+        return {"status": subject is not None, "subject": subject}
+
+    # Before the first refresh, ask the DB
     session = db.query(models.AttendanceSession).filter(
         models.AttendanceSession.section == section,
         models.AttendanceSession.is_active == True
@@ -179,7 +283,7 @@ async def get_current_class(
     else:
         return {"status": False, "subject": None}
 
-@app.post("/start_attendance_session", response_model=AttendanceSession, tags=["Faculty"])
+@app.post("/start_attendance_session", response_model=AttendanceSession, tags=["Faculty"], dependencies=[Depends(admission_control)])
 async def start_attendance_session(
     section: str,
     subject: str,
@@ -191,26 +295,15 @@ async def start_attendance_session(
     if credentials.get("role") != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can start attendance sessions")
     
-    # 1. Close existing
-    existing = db.query(models.AttendanceSession).filter(
-        models.AttendanceSession.section == section,
-        models.AttendanceSession.is_active == True
-    ).all()
-    for s in existing:
-        s.is_active = False
-    
-    # 2. Start new
-    new_session = models.AttendanceSession(
-        section=section,
-        subject=subject,
-        is_active=True
-    )
-    db.add(new_session)
-    db.commit()
+    # Close existing and start new as set-based statements in one transaction
+    try:
+        session_control.start_session(db, section, subject)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Another session was started at the same time, please retry")
     
     return {"status": True}
 
-@app.post("/stop_attendance_session", response_model=AttendanceSession, tags=["Faculty"])
+@app.post("/stop_attendance_session", response_model=AttendanceSession, tags=["Faculty"], dependencies=[Depends(admission_control)])
 async def stop_attendance_session(
     section: str,
     credentials: dict = Depends(JWTBearer()),
@@ -221,18 +314,11 @@ async def stop_attendance_session(
     if credentials.get("role") != "faculty":
         raise HTTPException(status_code=403, detail="Only faculty can stop attendance sessions")
     
-    session = db.query(models.AttendanceSession).filter(
-        models.AttendanceSession.section == section,
-        models.AttendanceSession.is_active == True
-    ).first()
-    
-    if session:
-        session.is_active = False
-        db.commit()
+    session_control.stop_session(db, section)
     
     return {"status": False}
 
-@app.get("/get_attendance_records", response_model=List[AttendanceRecordResponse], tags=["Attendance"])
+@app.get("/get_attendance_records", response_model=List[AttendanceRecordResponse], tags=["Attendance"], dependencies=[Depends(admission_control)])
 async def get_attendance_records(
     section: str,
     credentials: dict = Depends(JWTBearer()),
@@ -255,13 +341,15 @@ async def get_attendance_records(
     
     return result
 
-@app.get("/get_all_student_stats", response_model=List[StudentStatsResponse], tags=["Attendance"])
+@app.get("/get_all_student_stats", response_model=List[StudentStatsResponse], tags=["Attendance"], dependencies=[Depends(admission_control)])
 async def get_all_student_stats(
     section: str,
     credentials: dict = Depends(JWTBearer()),
     db: Session = Depends(database.get_db)
 ):
     """Get attendance statistics for all students in a section. Requires authentication."""
+    if bitset_store.ENABLED:
+        return bitset_store.section_stats(db, section)
     
     # Get all attendance records for this section
     all_records = db.query(models.AttendanceRecord).filter(
@@ -302,9 +390,181 @@ async def get_all_student_stats(
     
     return result
 
+@app.get("/get_defaulters", response_model=List[StudentStatsResponse], tags=["Attendance"], dependencies=[Depends(admission_control)])
+async def get_defaulters(
+    section: str,
+    threshold: float = bitset_store.DEFAULTER_THRESHOLD,
+    credentials: dict = Depends(JWTBearer()),
+    db: Session = Depends(database.get_db)
+):
+    """Get students below the attendance threshold, per subject. Requires the bitset store."""
+    if not bitset_store.ENABLED:
+        raise HTTPException(status_code=404, detail="Bitset attendance store is not enabled")
+    
+    return bitset_store.defaulters(db, section, threshold)
+
+@app.get("/export_attendance", tags=["Faculty"], dependencies=[Depends(admission_control)])
+async def export_attendance(
+    format: str = "csv",
+    section: Optional[str] = None,
+    department: Optional[str] = None,
+    pivot: bool = False,
+    credentials: dict = Depends(JWTBearer())
+):
+    """
+    Download attendance for a section, or every section of a department, as
+    CSV, XLSX or Parquet. Set `pivot` for a student x session matrix. Faculty only.
+    """
+    if credentials.get("role") != "faculty":
+        raise HTTPException(status_code=403, detail="Only faculty can export attendance")
+    
+    if format not in export.FORMATS:
+        raise HTTPException(status_code=400, detail=f"Format must be one of: {', '.join(export.FORMATS)}")
+    
+    if not section and not department:
+        raise HTTPException(status_code=400, detail="Provide a section or a department")
+    
+    def stream():
+        stats = {}
+        yield from export.export_attendance(format, section, department, pivot, stats=stats)
+        print(f"Export {section or department} ({format}): {stats['rows']} rows written, {stats['rows_per_second']} rows/s")
+    
+    filename = f"attendance_{section or department}.{format}"
+    return StreamingResponse(
+        stream(),
+        media_type=export.MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+def parse_dashboard_cursor(since: Optional[str]):
+    """Parse the sync timestamp cursor. Returns None for a full sync."""
+    if not since:
+        return None
+    try:
+        return datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid since cursor")
+
+def row_dashboard_stats(db: Session, section: str, subject_totals: dict, changed_keys: set = None) -> list:
+    """Attended classes per (username, subject) from the attendance rows, optionally only `changed_keys`."""
+    attended_query = db.query(
+        models.AttendanceRecord.username,
+        models.AttendanceRecord.subject,
+        func.count(models.AttendanceRecord.id)
+    ).filter(
+        models.AttendanceRecord.section == section,
+        models.AttendanceRecord.status == "Present"
+    )
+    if changed_keys is not None:
+        attended_query = attended_query.filter(
+            models.AttendanceRecord.subject.in_({subject for _, subject in changed_keys})
+        )
+
+    stats = []
+    for username, subject, attended in attended_query.group_by(
+        models.AttendanceRecord.username,
+        models.AttendanceRecord.subject
+    ).all():
+        if changed_keys is not None and (username, subject) not in changed_keys:
+            continue
+
+        total = subject_totals.get(subject, 0)
+        percentage = (attended / total * 100) if total > 0 else 0.0
+
+        stats.append({
+            "username": username,
+            "subject": subject,
+            "attended": attended,
+            "total": total,
+            "percentage": round(percentage, 2)
+        })
+    return stats
+
+@app.get("/get_dashboard", response_model=DashboardResponse, tags=["Attendance"], dependencies=[Depends(admission_control)])
+async def get_dashboard(
+    request: Request,
+    section: str,
+    since: Optional[str] = None,
+    credentials: dict = Depends(JWTBearer()),
+    db: Session = Depends(database.get_db)
+):
+    """
+    Get session state, per-student stats and attendance history in one payload.
+    Pass the cursor from the previous response as `since` to receive only
+    the history rows and stats counters that changed since then.
+    Requires authentication.
+    """
+    last_sync = parse_dashboard_cursor(since)
+    full = last_sync is None
+
+    # Taken before reading, so rows committing during this request are re-read next time
+    sync_time = db.query(func.now()).scalar()
+
+    # Current session state (always sent, it is a single row)
+    active = db.query(models.AttendanceSession).filter(
+        models.AttendanceSession.section == section,
+        models.AttendanceSession.is_active == True
+    ).first()
+    session_state = {
+        "status": bool(active),
+        "subject": active.subject if active else None,
+        "start_time": active.start_time.isoformat() if active and active.start_time else None
+    }
+
+    # History rows since the cursor. Ids are assigned at insert but rows become
+    # visible at commit, so re-read a safety window; the client drops duplicates by id.
+    records_query = db.query(models.AttendanceRecord).filter(
+        models.AttendanceRecord.section == section,
+        models.AttendanceRecord.status == "Present"
+    )
+    if not full:
+        records_query = records_query.filter(
+            models.AttendanceRecord.created_at >= last_sync - timedelta(seconds=DASHBOARD_SYNC_WINDOW_SECONDS)
+        )
+    records = records_query.order_by(models.AttendanceRecord.id).all()
+
+    history = []
+    for record in records:
+        history.append({
+            "id": record.id,
+            "date": record.date.strftime("%Y-%m-%d") if record.date else "",
+            "time": record.time.strftime("%H:%M:%S") if record.time else "",
+            "username": record.username,
+            "subject": record.subject
+        })
+
+    # Total classes per subject (one small aggregate, always sent in full so
+    # the client can update the totals of rows that did not change)
+    subject_totals = dict(db.query(
+        models.AttendanceSession.subject,
+        func.count(models.AttendanceSession.id)
+    ).filter(
+        models.AttendanceSession.section == section
+    ).group_by(models.AttendanceSession.subject).all())
+
+    # Per-student stats, only for (username, subject) keys touched by the window
+    changed_keys = {(r.username, r.subject) for r in records}
+    if bitset_store.ENABLED:
+        # Same source as /get_all_student_stats; deltas recompute only the touched subjects
+        stats = bitset_store.section_stats(db, section, None if full else {subject for _, subject in changed_keys})
+        if not full:
+            stats = [s for s in stats if (s["username"], s["subject"]) in changed_keys]
+    else:
+        stats = row_dashboard_stats(db, section, subject_totals, None if full else changed_keys)
+
+    return compressed_json_response(request, {
+        "cursor": sync_time.isoformat(),
+        "full": full,
+        "session": session_state,
+        "totals": subject_totals,
+        "stats": stats,
+        "history": history
+    })
+
 # --- Main ---
 
 if __name__ == "__main__":
+    import uvicorn
     print("Starting resource server on http://localhost:8001")
     print("Documentation available at http://localhost:8001/docs")
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -0,0 +1,102 @@
+import argparse
+import models, database
+import bitset_store
+from session_matching import created_local, latest_started, session_start
+
+# Converts existing attendance_records rows into the bitset store:
+# fills section_roster and active_sessions.attendee_bits.
+# Run migration_add_bitset_store.sql first. Safe to re-run: bits are OR-ed in.
+# Safe while ATTENDANCE_STORE=bitset is live: it takes the same roster and
+# session row locks as /add_attendance, which waits for each section to finish.
+
+
+def migrate_section(db, section: str) -> dict:
+    # Held until the commit below, so live bitset mode (roster_index) can't
+    # assign indexes in this section meanwhile
+    bitset_store.lock_roster(db, section)
+
+    # Existing roster, then new students after the highest index in use
+    roster = dict(db.query(models.SectionRoster.username, models.SectionRoster.idx).filter(
+        models.SectionRoster.section == section
+    ).all())
+    next_idx = max(roster.values(), default=-1) + 1
+
+    # Sessions per subject, sorted by start time, for matching records to their session.
+    # Locked, so marks set on an active session while we run wait and apply on top
+    # of the bits written back here instead of being overwritten.
+    sessions = db.query(models.AttendanceSession).filter(
+        models.AttendanceSession.section == section
+    ).order_by(models.AttendanceSession.start_time, models.AttendanceSession.id).with_for_update().all()
+
+    by_subject = {}
+    for s in sessions:
+        starts, ids = by_subject.setdefault(s.subject, ([], []))
+        starts.append(session_start(s.start_time))
+        ids.append(s.id)
+
+    records = db.query(
+        models.AttendanceRecord.username,
+        models.AttendanceRecord.subject,
+        models.AttendanceRecord.date,
+        models.AttendanceRecord.time,
+        created_local(db).label("created_local")
+    ).filter(
+        models.AttendanceRecord.section == section,
+        models.AttendanceRecord.status == "Present"
+    ).order_by(models.AttendanceRecord.id).yield_per(5000)
+
+    bits = {s.id: s.attendee_bits for s in sessions}
+    new_students = []
+    matched = unmatched = 0
+
+    for record in records:
+        # The record belongs to the latest session of its subject that started before it
+        starts, ids = by_subject.get(record.subject, ([], []))
+        i = latest_started(starts, record)
+        if i < 0:
+            unmatched += 1
+            continue
+
+        if record.username not in roster:
+            roster[record.username] = next_idx
+            next_idx += 1
+            new_students.append(record.username)
+
+        session_id = ids[i]
+        bits[session_id] = bitset_store.set_bit(bits[session_id], roster[record.username])
+        matched += 1
+
+    db.add_all([
+        models.SectionRoster(section=section, username=username, idx=roster[username])
+        for username in new_students
+    ])
+    for s in sessions:
+        s.attendee_bits = bits[s.id]
+    db.commit()
+
+    return {"matched": matched, "unmatched": unmatched, "students": len(roster), "sessions": len(sessions)}
+
+
+def migrate(sections=None):
+    db = database.SessionLocal()
+    try:
+        if not sections:
+            sections = [row.section for row in db.query(models.AttendanceRecord.section).distinct()]
+
+        for section in sections:
+            result = migrate_section(db, section)
+            print(
+                f"Section {section}: {result['matched']} marks -> {result['sessions']} session bitsets, "
+                f"{result['students']} students, {result['unmatched']} rows without a session"
+            )
+    finally:
+        db.close()
+
+    print("\nSUCCESS! Set ATTENDANCE_STORE=bitset to serve stats from the bitset store.")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert attendance rows into the bitset store.")
+    parser.add_argument("sections", nargs="*", help="Sections to migrate (default: all)")
+    args = parser.parse_args()
+    migrate(args.sections)
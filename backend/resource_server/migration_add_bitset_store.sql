@@ -0,0 +1,34 @@
+-- Bitset Attendance Store - Database Migration
+-- Run this SQL script on your PostgreSQL database (Neon or Render),
+-- then run migrate_to_bitset.py to convert existing attendance rows.
+-- The bitset store only speeds up stats. Attendance rows are still written,
+-- so this adds a little storage rather than saving any.
+
+-- Step 1: Packed attendee bitset per session
+ALTER TABLE active_sessions
+ADD COLUMN IF NOT EXISTS attendee_bits BYTEA;
+
+-- Step 2: Roster mapping each student to a bit index per section
+CREATE TABLE IF NOT EXISTS section_roster (
+    id SERIAL PRIMARY KEY,
+    section VARCHAR,
+    username VARCHAR,
+    idx INTEGER,
+    CONSTRAINT uq_roster_section_username UNIQUE (section, username),
+    CONSTRAINT uq_roster_section_idx UNIQUE (section, idx)
+);
+
+CREATE INDEX IF NOT EXISTS ix_section_roster_id ON section_roster(id);
+CREATE INDEX IF NOT EXISTS ix_section_roster_section ON section_roster(section);
+
+-- VERIFICATION QUERY
+-- Run this to check if the changes were applied correctly:
+SELECT
+    column_name,
+    data_type,
+    is_nullable
+FROM information_schema.columns
+WHERE table_name = 'active_sessions';
+
+-- Expected output should include:
+-- attendee_bits | bytea | YES
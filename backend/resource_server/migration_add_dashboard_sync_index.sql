@@ -0,0 +1,16 @@
+-- Dashboard Delta Sync - Database Migration
+-- Run this SQL script on your PostgreSQL database (Neon or Render)
+
+-- Step 1: Index the rows read by /get_dashboard delta syncs
+-- (section = ? AND created_at >= cursor - safety window)
+CREATE INDEX IF NOT EXISTS ix_attendance_records_section_created_at
+ON attendance_records(section, created_at);
+
+-- VERIFICATION QUERY
+-- Run this to check the index exists:
+SELECT indexname, indexdef
+FROM pg_indexes
+WHERE tablename = 'attendance_records';
+
+-- Expected output should include:
+-- ix_attendance_records_section_created_at | CREATE INDEX ... (section, created_at)
@@ -0,0 +1,49 @@
+-- Timetable-Driven Sessions - Database Migration
+-- Run this SQL script on your PostgreSQL database (Neon or Render)
+
+-- Step 1: Create timetable_slots table
+CREATE TABLE IF NOT EXISTS timetable_slots (
+    id SERIAL PRIMARY KEY,
+    section VARCHAR,
+    subject VARCHAR,
+    day_of_week INTEGER,
+    start_time TIME,
+    end_time TIME
+);
+
+CREATE INDEX IF NOT EXISTS ix_timetable_slots_id ON timetable_slots(id);
+CREATE INDEX IF NOT EXISTS ix_timetable_slots_section ON timetable_slots(section);
+
+-- Step 2: Link sessions opened by the scheduler to their slot
+ALTER TABLE active_sessions
+ADD COLUMN IF NOT EXISTS slot_id INTEGER;
+
+ALTER TABLE active_sessions
+ADD CONSTRAINT fk_timetable_slot
+FOREIGN KEY (slot_id)
+REFERENCES timetable_slots(id)
+ON DELETE SET NULL;
+
+-- Step 3: Open each slot occurrence only once, even with several schedulers running
+ALTER TABLE active_sessions
+ADD COLUMN IF NOT EXISTS occurrence_date DATE;
+
+CREATE UNIQUE INDEX IF NOT EXISTS uq_session_slot_occurrence
+ON active_sessions(slot_id, occurrence_date);
+
+-- Step 4: Identify slots by section, day and start time, so reimports update them in place
+CREATE UNIQUE INDEX IF NOT EXISTS uq_timetable_slot_start
+ON timetable_slots(section, day_of_week, start_time);
+
+-- VERIFICATION QUERY
+-- Run this to check if the changes were applied correctly:
+SELECT
+    column_name,
+    data_type,
+    is_nullable
+FROM information_schema.columns
+WHERE table_name = 'active_sessions';
+
+-- Expected output should include:
+-- slot_id | integer | YES
+-- occurrence_date | date | YES
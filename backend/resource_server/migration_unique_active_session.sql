@@ -0,0 +1,28 @@
+-- One Active Session Per Section - Database Migration
+-- Run this SQL script on your PostgreSQL database (Neon or Render)
+
+-- Step 1: Close duplicate active sessions, keeping the newest one per section
+UPDATE active_sessions
+SET is_active = FALSE
+WHERE is_active
+  AND id NOT IN (
+    SELECT MAX(id)
+    FROM active_sessions
+    WHERE is_active
+    GROUP BY section
+  );
+
+-- Step 2: Add partial unique index (only active rows are constrained)
+CREATE UNIQUE INDEX IF NOT EXISTS uq_active_session_per_section
+ON active_sessions(section)
+WHERE is_active;
+
+-- VERIFICATION QUERY
+-- Run this to check there is at most one active session per section:
+SELECT section, COUNT(*)
+FROM active_sessions
+WHERE is_active
+GROUP BY section
+HAVING COUNT(*) > 1;
+
+-- Expected output: no rows
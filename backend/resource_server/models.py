@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, Index, LargeBinary, UniqueConstraint, text
 from sqlalchemy.sql import func
 from database import Base
 
@@ -20,6 +20,38 @@ class AttendanceSession(Base):
     subject = Column(String)
     start_time = Column(DateTime, server_default=func.now())
     is_active = Column(Boolean, default=True)
+    slot_id = Column(Integer, ForeignKey("timetable_slots.id", ondelete="SET NULL"), nullable=True)  # Set when opened by the scheduler
+    occurrence_date = Column(Date, nullable=True)  # Local date of the slot occurrence (scheduler only)
+    attendee_bits = Column(LargeBinary, nullable=True)  # Bitset store: bit i = roster index i present
+
+    __table_args__ = (
+        # At most one active session per section (partial unique index)
+        Index(
+            "uq_active_session_per_section",
+            "section",
+            unique=True,
+            postgresql_where=text("is_active"),
+            sqlite_where=text("is_active")
+        ),
+        # The scheduler opens each slot occurrence once, even with several workers
+        Index("uq_session_slot_occurrence", "slot_id", "occurrence_date", unique=True),
+    )
+
+# Table: timetable_slots
+class TimetableSlot(Base):
+    __tablename__ = "timetable_slots"
+
+    id = Column(Integer, primary_key=True, index=True)
+    section = Column(String, index=True)
+    subject = Column(String)
+    day_of_week = Column(Integer)  # 0 = Monday ... 6 = Sunday
+    start_time = Column(Time)
+    end_time = Column(Time)
+
+    __table_args__ = (
+        # A slot is identified by when it starts, so reimports keep its id
+        Index("uq_timetable_slot_start", "section", "day_of_week", "start_time", unique=True),
+    )
 
 # Table: attendance_records
 class AttendanceRecord(Base):
@@ -33,3 +65,22 @@ class AttendanceRecord(Base):
     date = Column(Date)
     time = Column(Time)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        # Dashboard delta syncs read a section's rows created since the cursor
+        Index("ix_attendance_records_section_created_at", "section", "created_at"),
+    )
+
+# Table: section_roster (bitset store: username -> bit index per section)
+class SectionRoster(Base):
+    __tablename__ = "section_roster"
+
+    id = Column(Integer, primary_key=True, index=True)
+    section = Column(String, index=True)
+    username = Column(String)
+    idx = Column(Integer)
+
+    __table_args__ = (
+        UniqueConstraint("section", "username", name="uq_roster_section_username"),
+        UniqueConstraint("section", "idx", name="uq_roster_section_idx"),
+    )
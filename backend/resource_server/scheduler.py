@@ -0,0 +1,175 @@
+import asyncio
+import os
+import time
+from bisect import bisect_right
+from datetime import datetime
+from zoneinfo import ZoneInfo
+import models, database
+import session_control
+
+# --- Configuration (environment variables) ---
+
+# The timetable is written in local college time
+TIMEZONE = ZoneInfo(os.getenv("SCHEDULER_TIMEZONE", "Asia/Kolkata"))
+
+# How often the scheduler opens/closes sessions, and how often it re-reads the timetable
+TICK_SECONDS = int(os.getenv("SCHEDULER_TICK_SECONDS", "30"))
+RELOAD_SECONDS = int(os.getenv("TIMETABLE_RELOAD_SECONDS", "300"))
+
+# How often each worker re-reads active sessions for /get_current_class
+ACTIVE_REFRESH_SECONDS = int(os.getenv("ACTIVE_SESSION_REFRESH_SECONDS", "5"))
+
+# Safe to run on every worker: each slot occurrence is opened once (unique index).
+# Set to "false" to stop a worker from opening/closing sessions.
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"
+
+MINUTES_PER_DAY = 24 * 60
+
+
+def local_now() -> datetime:
+    return datetime.now(TIMEZONE)
+
+
+def week_minute(day_of_week: int, t) -> int:
+    """Minutes since Monday 00:00 for a weekday and a time of day."""
+    return day_of_week * MINUTES_PER_DAY + t.hour * 60 + t.minute
+
+
+class Slot:
+    """One timetable slot as stored in the index."""
+
+    __slots__ = ("id", "subject", "start", "end")
+
+    def __init__(self, id: int, subject: str, start: int, end: int):
+        self.id = id
+        self.subject = subject
+        self.start = start  # week minute, inclusive
+        self.end = end      # week minute, exclusive
+
+
+class TimetableIndex:
+    """
+    In-memory interval index: section -> slots sorted by start minute of the week.
+    Lookups are a binary search, so resolving the current class needs no DB access.
+    """
+
+    def __init__(self):
+        self.starts = {}  # section -> [start, ...]
+        self.slots = {}   # section -> [Slot, ...] (same order as starts)
+        self.loaded_at = 0.0
+
+    def load(self, slots):
+        """Rebuild the index from TimetableSlot rows."""
+        by_section = {}
+        for row in slots:
+            slot = Slot(
+                row.id,
+                row.subject,
+                week_minute(row.day_of_week, row.start_time),
+                week_minute(row.day_of_week, row.end_time)
+            )
+            by_section.setdefault(row.section, []).append(slot)
+
+        starts, sorted_slots = {}, {}
+        for section, section_slots in by_section.items():
+            section_slots.sort(key=lambda s: s.start)
+            sorted_slots[section] = section_slots
+            starts[section] = [s.start for s in section_slots]
+
+        # Swap in the new index in one step so readers never see a half-built one
+        self.starts, self.slots = starts, sorted_slots
+        self.loaded_at = time.monotonic()
+
+    def sections(self):
+        return list(self.slots)
+
+    def current(self, section: str, now: datetime = None):
+        """Return the Slot running for a section at `now` (local time), or None."""
+        starts = self.starts.get(section)
+        if not starts:
+            return None
+
+        now = now or local_now()
+        minute = week_minute(now.weekday(), now)
+        i = bisect_right(starts, minute) - 1
+        if i >= 0:
+            slot = self.slots[section][i]
+            if minute < slot.end:
+                return slot
+        return None
+
+
+timetable_index = TimetableIndex()
+
+
+def load_timetable():
+    """Read all timetable slots from the DB into the shared index."""
+    db = database.SessionLocal()
+    try:
+        timetable_index.load(db.query(models.TimetableSlot).all())
+    finally:
+        db.close()
+
+
+def refresh_active_sessions():
+    """Re-read which sessions are active (one query for all sections)."""
+    db = database.SessionLocal()
+    try:
+        session_control.active_sessions.refresh(db)
+    finally:
+        db.close()
+
+
+def sync_sessions(now: datetime = None):
+    """
+    Open a session for every section whose slot has started, and close
+    scheduler-opened sessions whose slot has ended. Manually started
+    sessions (slot_id is NULL) are only replaced when a scheduled class begins.
+    """
+    now = now or local_now()
+
+    db = database.SessionLocal()
+    try:
+        for section in timetable_index.sections():
+            slot = timetable_index.current(section, now)
+
+            if slot is None:
+                # Slot over: close what the scheduler opened
+                session_control.stop_session(db, section, scheduled_only=True)
+                continue
+
+            # Already opened for this occurrence of the slot (even if faculty stopped it since).
+            # The unique index on (slot_id, occurrence_date) settles races between workers.
+            if session_control.occurrence_opened(db, slot.id, now.date()):
+                continue
+
+            session_control.start_session(
+                db, section, slot.subject,
+                slot_id=slot.id,
+                occurrence_date=now.date()
+            )
+    finally:
+        db.close()
+
+
+async def run_scheduler():
+    """Background loop started from the app lifespan."""
+    while True:
+        try:
+            if time.monotonic() - timetable_index.loaded_at >= RELOAD_SECONDS:
+                await asyncio.to_thread(load_timetable)
+            if SCHEDULER_ENABLED:
+                await asyncio.to_thread(sync_sessions)
+        except Exception as e:
+            print(f"Scheduler tick failed: {e}")
+        await asyncio.sleep(TICK_SECONDS)
+
+
+async def run_active_session_refresh():
+    """Background loop keeping the active-session cache in step with other workers."""
+    while True:
+        try:
+            await asyncio.to_thread(refresh_active_sessions)
+        except Exception as e:
+            print(f"Active session refresh failed: {e}")
+        await asyncio.sleep(ACTIVE_REFRESH_SECONDS)
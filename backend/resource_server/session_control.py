@@ -0,0 +1,138 @@
+import threading
+from sqlalchemy import update, insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+import models
+
+# A concurrent start can win the race for the partial unique index
+# (uq_active_session_per_section). The loser retries this many times.
+MAX_START_ATTEMPTS = 3
+
+
+class ActiveSessionCache:
+    """
+    In-memory section -> subject of the active session, for /get_current_class
+    and /check_attendance_session. Updated by start/stop in this process and
+    refreshed from the DB periodically (scheduler.run_active_session_refresh)
+    to pick up other workers' changes.
+
+    Local updates are versioned: a refresh keeps the local value of any section
+    started or stopped after its query began, so an older snapshot never
+    overwrites a newer start/stop.
+    """
+
+    def __init__(self):
+        self.subjects = {}
+        self.ready = False
+        self.version = 0
+        self.changed_at = {}  # section -> version of its last local update
+        self.lock = threading.Lock()
+
+    def refresh(self, db: Session):
+        version = self.version
+        rows = db.query(models.AttendanceSession.section, models.AttendanceSession.subject).filter(
+            models.AttendanceSession.is_active == True
+        ).all()
+        subjects = {row.section: row.subject for row in rows}
+
+        with self.lock:
+            for section, changed in self.changed_at.items():
+                if changed > version:
+                    if section in self.subjects:
+                        subjects[section] = self.subjects[section]
+                    else:
+                        subjects.pop(section, None)
+            self.changed_at = {section: changed for section, changed in self.changed_at.items() if changed > version}
+            # Swap in one step so readers never see a half-built map
+            self.subjects = subjects
+            self.ready = True
+
+    def get(self, section: str):
+        """Subject of the active session, or None. Only meaningful once ready."""
+        return self.subjects.get(section)
+
+    def opened(self, section: str, subject: str):
+        with self.lock:
+            self.version += 1
+            self.changed_at[section] = self.version
+            self.subjects[section] = subject
+
+    def closed(self, section: str):
+        with self.lock:
+            self.version += 1
+            self.changed_at[section] = self.version
+            self.subjects.pop(section, None)
+
+
+active_sessions = ActiveSessionCache()
+
+
+def close_active_sessions(db: Session, section: str, scheduled_only: bool = False) -> list:
+    """
+    Deactivate the active session(s) of a section with a single
+    UPDATE ... RETURNING. Does not commit. Returns the closed session ids.
+    """
+    stmt = update(models.AttendanceSession).where(
+        models.AttendanceSession.section == section,
+        models.AttendanceSession.is_active == True
+    )
+    if scheduled_only:
+        stmt = stmt.where(models.AttendanceSession.slot_id.is_not(None))
+
+    stmt = stmt.values(is_active=False).returning(models.AttendanceSession.id)
+    return list(db.execute(stmt).scalars())
+
+
+def stop_session(db: Session, section: str, scheduled_only: bool = False) -> list:
+    """Close the active session of a section and commit. Returns the closed ids."""
+    closed = close_active_sessions(db, section, scheduled_only)
+    db.commit()
+    if closed:
+        active_sessions.closed(section)
+    return closed
+
+
+def occurrence_opened(db: Session, slot_id: int, occurrence_date) -> bool:
+    """True if a session was already opened for this slot occurrence (active or not)."""
+    return db.query(models.AttendanceSession.id).filter(
+        models.AttendanceSession.slot_id == slot_id,
+        models.AttendanceSession.occurrence_date == occurrence_date
+    ).first() is not None
+
+
+def start_session(db: Session, section: str, subject: str, slot_id: int = None,
+                  occurrence_date=None, start_time=None):
+    """
+    Close any active session of the section and open a new one, in one
+    transaction. Returns the new session id.
+
+    The partial unique index guarantees only one active row per section,
+    so if a concurrent start commits first the INSERT fails and we retry.
+    For scheduled sessions, uq_session_slot_occurrence makes opening a slot
+    occurrence idempotent: returns None if it was already opened.
+    """
+    values = {
+        "section": section,
+        "subject": subject,
+        "is_active": True,
+        "slot_id": slot_id,
+        "occurrence_date": occurrence_date
+    }
+    if start_time is not None:
+        values["start_time"] = start_time
+
+    for attempt in range(MAX_START_ATTEMPTS):
+        try:
+            close_active_sessions(db, section)
+            new_id = db.execute(
+                insert(models.AttendanceSession).values(**values).returning(models.AttendanceSession.id)
+            ).scalar_one()
+            db.commit()
+            active_sessions.opened(section, subject)
+            return new_id
+        except IntegrityError:
+            db.rollback()
+            if slot_id is not None and occurrence_opened(db, slot_id, occurrence_date):
+                return None
+            if attempt == MAX_START_ATTEMPTS - 1:
+                raise
@@ -0,0 +1,41 @@
+from bisect import bisect_right
+from datetime import datetime
+from sqlalchemy import func
+import models
+
+# Matching attendance rows to the session they were marked in, for rows
+# written without a session reference: a row belongs to the latest session
+# of its section and subject that started before it. Used by
+# migrate_to_bitset.py and the pivoted export.
+
+
+def created_local(db):
+    """
+    created_at as a naive timestamp in the DB session time zone. start_time is
+    a naive column filled by now(), i.e. stored in that zone, so only then are
+    the two comparable. SQLite stores both as naive UTC already.
+    Select it labelled "created_local" for record_time().
+    """
+    created_at = models.AttendanceRecord.created_at
+    if db.get_bind().dialect.name == "postgresql":
+        return func.timezone(func.current_setting("TimeZone"), created_at)
+    return created_at
+
+
+def record_time(record):
+    if record.created_local:
+        return record.created_local
+    if record.date and record.time:
+        return datetime.combine(record.date, record.time)
+    return None
+
+
+def session_start(start_time) -> datetime:
+    """Sort key for session start times; sessions without one sort first."""
+    return start_time or datetime.min
+
+
+def latest_started(starts: list, record) -> int:
+    """Position in sorted `starts` of the latest session started before the record, or -1."""
+    when = record_time(record)
+    return bisect_right(starts, when) - 1 if when else -1